@@ -0,0 +1,244 @@
+# %%
+import csv
+import html
+import json
+import re
+import unicodedata
+
+from collections import Counter, defaultdict
+from functools import cache
+from itertools import combinations
+from os.path import exists
+from typing import Iterable, Optional
+
+# Lower-case words that belong to the family name when they precede it, e.g. 'van den Berg'.
+PARTICLES = {'da', 'das', 'de', 'del', 'della', 'den', 'der', 'des', 'di', 'do', 'dos',
+             'du', 'la', 'le', 'ten', 'ter', 'van', 'von'}
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+GIVEN_TOKEN = re.compile(r'([^\W\d_]+)(\.?)')
+FAMILY_JUNK = re.compile(r'[\W\d_]+')
+GLUED_INITIALS = re.compile(r'((?:[^\W\d_][.]-?)+)([^\W\d_].*)')
+INITIALS = re.compile(r'(?:[^\W\d_][.]-? ?)+')
+
+# %%
+@cache
+def split_name(name: str) -> tuple[str, str]:
+    # Given and family names for OJS. Particles stay with the family name and a suffix
+    # such as 'Jr.' is appended to it, rather than becoming the family name itself.
+    base, comma, suffix = name.partition(', ')
+    
+    if comma and suffix.strip('.').casefold() not in SUFFIXES:
+        base, comma, suffix = name, '', ''
+    
+    tokens = base.split()
+    # Initials run into the family name ('G.M.Kelly') are split off at the last dot.
+    # A token that is all initials ('Dubuc E.J.', family name first) is left whole.
+    glued = GLUED_INITIALS.fullmatch(tokens[-1]) \
+        if tokens and not INITIALS.fullmatch(tokens[-1]) else None
+    
+    if glued:
+        tokens[-1:] = glued.groups()
+    
+    if not comma and len(tokens) > 2 and tokens[-1].strip('.').casefold() in SUFFIXES:
+        suffix = tokens.pop()
+    
+    i = len(tokens) - 1
+    
+    # At least one token is always left for the given name.
+    while i > 1 and tokens[i - 1].casefold() in PARTICLES:
+        i -= 1
+    
+    given, family = ' '.join(tokens[:i]), ' '.join(tokens[i:])
+    
+    if suffix:
+        family = f'{family}, {suffix}' if comma else f'{family} {suffix}'
+    
+    return given, family
+
+def fold(text: str) -> str:
+    # HTML entities decoded, accents dropped and case folded: 'Ji&#345;&#237;' -> 'jiri'.
+    text = unicodedata.normalize('NFKD', html.unescape(text))
+    return ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+
+# %%
+class AuthorName:
+    __slots__ = ('name', 'given', 'family', 'family_key', 'tokens')
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.given, self.family = split_name(name)
+        family = self.family.partition(', ')[0]
+        
+        if family.split()[-1].strip('.').casefold() in SUFFIXES and ' ' in family:
+            family = family.rsplit(' ', 1)[0]
+        
+        self.family_key = FAMILY_JUNK.sub('', fold(family))
+        # (token, abbreviated) pairs; a single letter counts as an initial with or without
+        # its dot, so 'R.F.C Walters' lines up with 'R. F. C. Walters'.
+        self.tokens = tuple((token, bool(dot) or len(token) == 1)
+                            for token, dot in GIVEN_TOKEN.findall(fold(self.given)))
+    
+    def __repr__(self):
+        return self.name
+
+def within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    
+    i = 0
+    
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    
+    # Substitution, adjacent transposition or a single insertion into the shorter string.
+    return (a[i + 1:] == b[i + 1:] or a[i:] == b[i + 1:]
+            or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1]))
+
+def match_tokens(a: tuple[str, bool], b: tuple[str, bool]) -> Optional[str]:
+    (a, a_abbr), (b, b_abbr) = a, b
+    
+    if a == b:
+        return 'exact'
+    if (a_abbr and b.startswith(a)) or (b_abbr and a.startswith(b)):
+        return 'initials'
+    if min(len(a), len(b)) >= 5 and within_one_edit(a, b):
+        return 'variant'
+    
+    return None
+
+def compare(a: AuthorName, b: AuthorName) -> Optional[list[str]]:
+    # First given names must agree; the remaining ones of the shorter name must then
+    # appear in order among the longer one's, which allows dropped middle names.
+    if not a.tokens or not b.tokens:
+        return None
+    
+    short, long = sorted((a.tokens, b.tokens), key=len)
+    first = match_tokens(short[0], long[0])
+    
+    if not first:
+        return None
+    
+    reasons = {first}
+    rest = iter(long[1:])
+    
+    for token in short[1:]:
+        for other in rest:
+            match = match_tokens(token, other)
+            
+            if match:
+                reasons.add(match)
+                break
+        else:
+            return None
+    
+    if len(short) != len(long):
+        reasons.add('middle names')
+    if a.family_key != b.family_key:
+        reasons.add('family variant')
+    
+    reasons.discard('exact')
+    return sorted(reasons) or ['spelling']
+
+# %%
+class AuthorIndex:
+    def __init__(self, authors: Iterable[str]):
+        self.counts = Counter(authors)
+        self.names = [AuthorName(name) for name in self.counts]
+        self.blocks = defaultdict(list)
+        
+        for name in self.names:
+            self.blocks[name.family_key].append(name)
+    
+    def family_pairs(self) -> Iterable[tuple[str, str]]:
+        # Family keys within one edit of each other share a key with one letter deleted
+        # (a symmetric-deletion index), which finds them without comparing every pair.
+        # Short keys are skipped, as one edit there mostly links unrelated names.
+        deletions = defaultdict(set)
+        
+        for key in self.blocks:
+            if len(key) >= 5:
+                for i in range(len(key)):
+                    deletions[key[:i] + key[i + 1:]].add(key)
+                
+                deletions[key].add(key)
+        
+        pairs = {pair for keys in deletions.values() if len(keys) > 1
+                 for pair in combinations(sorted(keys), 2)}
+        return sorted(pair for pair in pairs if within_one_edit(*pair))
+    
+    def candidates(self) -> list[dict]:
+        # Names are only compared within a family-name block (or a pair of near-identical
+        # blocks), and there only when their given names start with the same letter.
+        found = []
+        
+        def by_initial(names: list[AuthorName]) -> dict[str, list[AuthorName]]:
+            groups = defaultdict(list)
+            
+            for name in names:
+                if name.tokens:
+                    groups[name.tokens[0][0][0]].append(name)
+            
+            return groups
+        
+        def add(a: AuthorName, b: AuthorName) -> None:
+            reasons = compare(a, b)
+            
+            if reasons:
+                a, b = sorted((a, b), key=lambda name: (-self.counts[name.name], name.name))
+                found.append({'name': a.name, 'count': self.counts[a.name],
+                              'other': b.name, 'other_count': self.counts[b.name],
+                              'reason': ', '.join(reasons)})
+        
+        for block in self.blocks.values():
+            for group in by_initial(block).values():
+                for a, b in combinations(group, 2):
+                    add(a, b)
+        
+        for key, other_key in self.family_pairs():
+            other_groups = by_initial(self.blocks[other_key])
+            
+            for initial, group in by_initial(self.blocks[key]).items():
+                for a in group:
+                    for b in other_groups.get(initial, []):
+                        add(a, b)
+        
+        return sorted(found, key=lambda row: (row['name'], row['other']))
+    
+    def uncertain_splits(self) -> list[dict]:
+        # Names where the given/family split is a guess: several full given names (possibly
+        # a compound family name), particles, a suffix, no given name at all or only
+        # initials for a family name ('Dubuc E.J.', written family name first).
+        rows = []
+        
+        for name in self.names:
+            full = [token for token, abbreviated in name.tokens if not abbreviated]
+            
+            if len(full) > 1 or ' ' in name.family or not name.given \
+               or INITIALS.fullmatch(name.family):
+                rows.append({'name': name.name, 'count': self.counts[name.name],
+                             'given': name.given, 'family': name.family})
+        
+        return sorted(rows, key=lambda row: row['name'])
+    
+    def write_report(self, file: str) -> None:
+        with open(file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'name', 'count', 'other', 'other_count', 'reason'])
+            
+            for row in self.candidates():
+                writer.writerow(['duplicate', row['name'], row['count'], row['other'],
+                                 row['other_count'], row['reason']])
+            for row in self.uncertain_splits():
+                writer.writerow(['split', row['name'], row['count'], row['given'], '',
+                                 f"family name '{row['family']}'"])
+
+def load_aliases(file: str) -> dict[str, str]:
+    # Reviewed duplicates, as {variant: canonical name}; variants then share the ID of the
+    # canonical name.
+    if not exists(file):
+        return {}
+    
+    with open(file, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,601 @@
+# %%
+import gzip
+import json
+import pickle
+import platform
+import re
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+
+from argparse import ArgumentParser
+from copy import copy
+from corrections import Corrections
+from datetime import datetime as dt
+from io import StringIO
+from main import group_volumes, save_author_ids
+from os.path import exists
+from publications import FIELDS, ISSUE, PAGE_RANGE, Article
+from registry import MetadataRegistry
+from tempfile import TemporaryDirectory
+from typing import Callable, Optional
+from validation import validate_volumes
+
+# %%
+class LegacyArticle(Article):
+    # The multi-pass parser Article used before the single-pass sweep (every setter
+    # re-splits the page and rescans it from the top) and the f-string renderer used before
+    # the compiled templates. Kept as the reference for parse and render benchmarks.
+    def __init__(self, source: str):
+        self.set_pdf_src(source)
+        self.set_title(source)
+        self.set_authors(source)
+        self.set_abstract(source)
+        self.set_keywords(source)
+        self.set_issue_ident(source)
+        self.set_page_range(source)
+    
+    def set_pdf_src(self, source: str) -> None:
+        source_iter = (line.strip() for line in source.split('\n'))
+        
+        try:
+            valid = lambda line: 'citation_pdf_url' not in line
+            target = lambda line: re.search(r'\d[.]pdf', line)
+            src_line = next(line for line in source_iter if valid(line) and target(line))
+            src = src_line.split('"')[1]
+        except StopIteration:
+            source_iter = (line.strip() for line in source.split('\n'))
+            target = lambda line: re.search(r'\d[.](dvi|ps)', line)
+            src_line = next(line for line in source_iter if target(line))   
+            src = src_line.split('"')[1]
+            src = re.sub(r'[.](dvi|ps)', '.pdf', src)
+        
+        self.pdf_src = src
+    
+    def set_title(self, source: str) -> None:
+        source_iter = (line.strip() for line in source.split('\n'))
+        next(line for line in source_iter if '<h1>' in line)
+        line = next(source_iter)
+        title_lines = []
+        
+        while '</h1>' not in line:
+            title_lines.append(line)
+            line = next(source_iter)
+        
+        title = re.sub(r'\s+|<p>|</p>', ' ', ' '.join(title_lines)).strip(' ,')
+        
+        if title.upper() == 'APPROXIMABLE CONCEPTS, CHU SPACES, AND INFORMATION SYSTEMS':
+            title = 'Approximable concepts, Chu spaces, and information systems'
+        
+        self.title = title
+    
+    def set_authors(self, source: str) -> None:
+        source_iter = (line.strip() for line in source.split('\n'))
+        author_lines = []
+        next(line for line in source_iter if '</h1>' in line)
+        line = next(source_iter)
+        
+        while line == '' or '<h2>' in line:
+            line = next(source_iter)
+        
+        while '<h2>' not in line and '</h2>' not in line:
+            author_lines.append(line)
+            line = next(source_iter)
+        
+        authors = ' '.join(author_lines).replace(' and ', ',').split(',')
+        authors = [re.sub(r'\s+', ' ', author.strip(' ,')) for author in authors]
+        authors = [author for author in authors if author != '']
+        
+        if 'Jr.' in authors:
+            idx = authors.index('Jr.')
+            authors[idx - 1] = f'{authors[idx - 1]}, Jr.'
+            authors.pop(idx)
+        
+        self.authors = authors
+    
+    def set_abstract(self, source: str) -> str:
+        source_iter = (line.strip() for line in source.split('\n'))
+        next(line for line in source_iter if '</h2>' in line)
+        next(line for line in source_iter if '<p>' in line)
+        line = next(source_iter)
+        abstract_lines = []
+        
+        while 'Keywords:' not in line:
+            abstract_lines.append(line)
+            line = next(source_iter)
+        
+        abstract = re.sub(r'<p>|</p>', ' ', ' '.join(abstract_lines)).strip()
+        abstract = re.sub(r'\s+', ' ', abstract)
+        abstract = re.sub(r'\s<br>\s|\s<br>|<br>\s', '<br>', abstract)
+        classif_lines = []
+        
+        if 'Keywords:' not in line:
+            line = next(line for line in source_iter if 'Keywords:' in line)
+        
+        line = next(line for line in source_iter if '<p>' in line)
+        
+        if line == '<p>':
+            line = next(source_iter)
+        
+        while '</p>' not in line:
+            classif_lines.append(line)
+            line = next(source_iter)
+        
+        if line != '</p>':
+            classif_lines.append(line)
+        
+        classif = re.sub(r'<p>|</p>', ' ', ' '.join(classif_lines)).strip()
+        classif = classif.replace(',', ', ')
+        classif = re.sub(r'\s+', ' ', classif)
+        
+        if not classif.endswith('.'):
+            classif += '.'
+        
+        abstract = f'<p>{abstract}</p><p>{classif}</p>'
+        self.abstract = abstract
+    
+    def set_keywords(self, source: str) -> None:
+        source_iter = (line.strip() for line in source.split('\n'))
+        line = next(line for line in source_iter if 'Keywords:' in line)
+        keyword_lines = []
+        
+        if line.endswith('Keywords:'):
+            line = next(source_iter)
+        
+        while '</p>' not in line:
+            keyword_lines.append(line)
+            line = next(source_iter)
+        
+        keywords_line = ' '.join(keyword_lines)
+        keywords = re.split(r',|;', keywords_line)
+        keywords = [re.sub(r'Keywords:|<p>|</p>', '', word) for word in keywords]
+        keywords = [word.strip(' .') for word in keywords]
+        keywords = [re.sub(r'\s+', ' ', word) for word in keywords]
+        keywords = [re.sub(r'\s[-]\s|[-]\s|\s[-]', '-', word) for word in keywords]
+        keywords = [word for word in keywords if word != '']
+        
+        for i, word in enumerate(keywords):
+            if word.endswith('-'):
+                keywords[i] = word + keywords[i + 1]
+                keywords.pop(i + 1)
+        
+        self.keywords = keywords
+    
+    def set_issue_ident(self, source: str) -> None:
+        source_iter = iter([line.strip() for line in source.split('\n')])
+        next(line for line in source_iter if 'Keywords:' in line)
+        info = next(line for line in source_iter if 'Vol.' in line).split(' ')
+        info = [bit.strip(' ,') for bit in info]
+        
+        vol_idx = info.index('Vol.') + 1
+        volume, year = int(info[vol_idx]), info[vol_idx + 1]
+        
+        year = int(year[2:]) if year.startswith('CT') else int(year)
+        self.volume, self.year = volume, year
+    
+    def set_page_range(self, source: str) -> None:
+        def pp_idxs(line: str) -> tuple[int, int]:
+            search1 = re.search(r'pp \d+-+\d+', line)
+            search2 = re.search(r'pp\d+-+\d+', line)
+            search3 = re.search(r'pp[.] \d+-+\d+', line)
+            search4 = re.search(r'pp[.]\d+-+\d+', line)
+            search5 = re.search(r'pp [.]\d+-+\d+', line)
+            
+            if search1:
+                idxs = (search1.start() + 3, search1.end())
+            elif search2:
+                idxs = (search2.start() + 2, search2.end())
+            elif search3:
+                idxs = (search3.start() + 4, search3.end())
+            elif search4:
+                idxs = (search4.start() + 3, search4.end())
+            elif search5:
+                idxs = search5.start() + 4, search5.end()
+            else:
+                idxs = None
+            
+            return idxs
+        
+        source_iter = iter([line.strip() for line in source.split('\n')])
+        next(line for line in source_iter if 'Keywords:' in line)
+        pp_line = next((line for line in source_iter if pp_idxs(line)), None)
+        fixes = Corrections.shipped().lookup(self.title, self.authors)
+        
+        if fixes:
+            self.start_page, self.end_page = fixes['start_page'], fixes['end_page']
+        else:
+            idxs = pp_idxs(pp_line)
+            pp_range = pp_line[idxs[0]:idxs[1]].split('-')
+            self.start_page, self.end_page = int(pp_range[0]), int(pp_range[-1])
+    
+    def legacy_XML_block(self, file_id: int, seq_in_vol: int, vol_title: Optional[str],
+                         registry: MetadataRegistry) -> str:
+        author_ids = registry.author_ids
+        ids_this = [author_ids[author] for author in self.authors]
+        size = registry.pdf_size(self.pdf_src)
+        date = dt.now().strftime('%Y-%m-%d')
+        t = '  '
+        
+        out = StringIO()
+        out.write(f'{t}<article xmlns="http://pkp.sfu.ca" ' \
+                  'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" locale="en" ' \
+                  f'date_submitted="{date}" status="3" submission_progress="" ' \
+                  'current_publication_id="1" stage="production" ' \
+                  'xsi:schemaLocation="http://pkp.sfu.ca native.xsd">\n')
+        out.write(f'{t * 2}<id type="internal" advice="ignore">{file_id}</id>\n')
+        
+        out.write(f'{t * 2}<submission_file ' \
+                  f'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" id="{file_id}" ' \
+                  f'created_at="{date}" date_created="" file_id="{file_id}" ' \
+                  f'stage="submission" updated_at="{date}" viewable="true" ' \
+                  f'genre="Article Text" source_submission_file_id="{file_id}" ' \
+                  'uploader="admin" xsi:schemaLocation="http://pkp.sfu.ca native.xsd">\n')
+        out.write(f'{t * 3}<name locale="en">{self.pdf_src.split("/")[-1]}</name>\n')
+        out.write(f'{t * 3}<file id="{file_id}" filesize="{size}" extension="pdf">\n')
+        out.write(f'{t * 4}<href src="{self.pdf_src}"/>\n')
+        out.write(f'{t * 3}</file>\n')
+        out.write(f'{t * 2}</submission_file>\n')
+        
+        out.write(f'{t * 2}<publication ' \
+                  'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" version="1" ' \
+                  f'status="3" primary_contact_id="{ids_this[0]}" url_path="" ' \
+                  f'seq="{seq_in_vol}" access_status="0" date_published="{date}" ' \
+                  'section_ref="ART" xsi:schemaLocation="http://pkp.sfu.ca native.xsd">\n')
+        
+        out.write(f'{t * 3}<id type="internal" advice="ignore">{file_id}</id>\n')
+        out.write(f'{t * 3}<id type="doi" advice="update">10.1119/5.0158200</id>\n')
+        out.write(f'{t * 3}<title locale="en">{self.title}</title>\n')
+        out.write(f'{t * 3}<abstract locale="en">{self.abstract}</abstract>\n')
+        out.write(f'{t * 3}<licenseUrl>http://www.tac.mta.ca/tac/consent.html' \
+                  '</licenseUrl>\n')
+        out.write(f'{t * 3}<copyrightHolder locale="en">author</copyrightHolder>\n')
+        out.write(f'{t * 3}<copyrightYear>{self.year}</copyrightYear>\n')
+        
+        out.write(f'{t * 3}<keywords locale="en">\n')
+        for word in self.keywords:
+            out.write(f'{t * 4}<keyword>{word}</keyword>\n')
+        out.write(f'{t * 3}</keywords>\n')
+        
+        out.write(f'{t * 3}<authors xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ' \
+                  'xsi:schemaLocation="http://pkp.sfu.ca native.xsd">\n')
+        for i, author in enumerate(self.authors):
+            author_id = ids_this[i]
+            names = author.split()
+            given_name = ' '.join(names[:-1])
+            family_name = names[-1]
+            out.write(f'{t * 4}<author include_in_browse="true" user_group_ref="Author" ' \
+                      f'seq="{i}" id="{author_id}">\n')
+            out.write(f'{t * 5}<givenname locale="en">{given_name}</givenname>\n')
+            out.write(f'{t * 5}<familyname locale="en">{family_name}</familyname>\n')
+            out.write(f'{t * 5}<email>madeup@email.org</email>\n')
+            out.write(f'{t * 4}</author>\n')
+        out.write(f'{t * 3}</authors>\n')
+        
+        out.write(f'{t * 3}<article_galley ' \
+                  'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" locale="en" ' \
+                  'url_path="" approved="false" ' \
+                  'xsi:schemaLocation="http://pkp.sfu.ca native.xsd">\n')
+        out.write(f'{t * 4}<id type="internal" advice="ignore">{file_id}</id>\n')
+        out.write(f'{t * 4}<name locale="en">PDF</name>\n')
+        out.write(f'{t * 4}<seq>{seq_in_vol}</seq>\n')
+        out.write(f'{t * 4}<submission_file_ref id="{file_id}"/>\n')
+        out.write(f'{t * 3}</article_galley>\n')
+        
+        out.write(f'{t * 3}<issue_identification>\n')
+        out.write(f'{t * 4}<volume>{self.volume}</volume>\n')
+        out.write(f'{t * 4}<year>{self.year}</year>\n')
+        if vol_title:
+            out.write(f'{t * 4}<title locale="en">{vol_title}</title>\n')
+        out.write(f'{t * 3}</issue_identification>\n')
+        
+        out.write(f'{t * 3}<pages>{self.start_page}-{self.end_page}</pages>\n')
+        out.write(f'{t * 2}</publication>\n')
+        out.write(f'{t}</article>\n')
+        
+        return out.getvalue()
+
+# %%
+class StubRegistry(MetadataRegistry):
+    # Serves a fixed PDF size instead of the cached HEAD results, so benchmarks never touch
+    # the network or depend on data/pdf_sizes.gz. Tables passed in are served from memory
+    # in place of the files in `path`.
+    def __init__(self, path: str = 'data', tables: Optional[dict] = None):
+        super().__init__(path)
+        self.stubs = tables or {}
+    
+    def load(self, name: str):
+        return self.stubs[name] if name in self.stubs else super().load(name)
+    
+    def pdf_size(self, url: str) -> int:
+        return 100000
+
+class ByteCounter:
+    # Write target for render benchmarks; counts output without keeping or storing it.
+    def __init__(self):
+        self.bytes = 0
+    
+    def write(self, data: bytes) -> None:
+        self.bytes += len(data)
+
+# %%
+def load_sources(path: str = 'data') -> list[str]:
+    with gzip.open(f'{path}/sources.gz', 'rb') as f:
+        return pickle.load(f)
+
+def time_per_item(funcs: list, items: list, *, repeat: int = 5) -> list[float]:
+    # Runs of each function are interleaved so machine noise hits all of them alike; the
+    # best run is kept.
+    best = [float('inf')] * len(funcs)
+    
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            start = time.perf_counter()
+            
+            for item in items:
+                func(item)
+            
+            best[i] = min(best[i], time.perf_counter() - start)
+    
+    return [elapsed / len(items) for elapsed in best]
+
+def bench_parse(sources: list[str], *, repeat: int = 5) -> dict:
+    # The legacy parser builds author and keyword lists where Article now keeps tuples.
+    pairs = zip(map(Article, sources), map(LegacyArticle, sources))
+    mismatches = sum(any(getattr(new, field) != tuple(value) if isinstance(value, list)
+                         else getattr(new, field) != value
+                         for field, value in zip(FIELDS, old.astuple()))
+                     for new, old in pairs)
+    legacy, current = time_per_item([LegacyArticle, Article], sources, repeat=repeat)
+    
+    return {'articles': len(sources), 'mismatches': mismatches,
+            'legacy_us': legacy * 1e6, 'current_us': current * 1e6,
+            'speedup': legacy / current}
+
+# The per-line page range search the single-pass parser used before PAGE_RANGE: five
+# patterns in order of precedence, with the offset of the first digit in each match.
+PAGE_RANGES = [(re.compile(r'pp \d+-+\d+'), 3),
+               (re.compile(r'pp\d+-+\d+'), 2),
+               (re.compile(r'pp[.] \d+-+\d+'), 4),
+               (re.compile(r'pp[.]\d+-+\d+'), 3),
+               (re.compile(r'pp [.]\d+-+\d+'), 4)]
+
+def pp_span(line: str) -> Optional[tuple[int, int]]:
+    for reg, offset in PAGE_RANGES:
+        search = reg.search(line)
+        
+        if search:
+            return search.start() + offset, search.end()
+    
+    return None
+
+def citation_lines(source: str) -> list[str]:
+    # The lines Article scans for the citation: everything after the 'Keywords:' line.
+    lines = [line.strip() for line in source.split('\n')]
+    start = next(i for i, line in enumerate(lines) if 'Keywords:' in line)
+    return lines[start + 1:]
+
+def legacy_citation(lines: list[str]) -> tuple:
+    vol_line = pp_line = None
+    
+    for line in lines:
+        if vol_line is None and 'Vol.' in line:
+            vol_line = line
+        if pp_line is None and 'pp' in line and pp_span(line):
+            pp_line = line
+        if vol_line and pp_line:
+            break
+    
+    info = [bit.strip(' ,') for bit in vol_line.split(' ')]
+    vol_idx = info.index('Vol.') + 1
+    volume, year = int(info[vol_idx]), info[vol_idx + 1]
+    year = int(year[2:]) if year.startswith('CT') else int(year)
+    
+    if pp_line is None:
+        return volume, year, None, None
+    
+    idxs = pp_span(pp_line)
+    pp_range = pp_line[idxs[0]:idxs[1]].split('-')
+    return volume, year, int(pp_range[0]), int(pp_range[-1])
+
+def current_citation(lines: list[str]) -> tuple:
+    # Article's citation scan, lifted out of the parser loop.
+    issue = pages = None
+    
+    for line in lines:
+        if issue is None and 'Vol.' in line:
+            issue = ISSUE.search(line)
+        if pages is None and 'pp' in line:
+            pages = PAGE_RANGE.search(line)
+        if issue and pages:
+            break
+    
+    if pages is None:
+        return int(issue[1]), int(issue[2]), None, None
+    
+    return int(issue[1]), int(issue[2]), int(pages[1]), int(pages[2])
+
+def bench_citation(sources: list[str], *, repeat: int = 20) -> dict:
+    # Volume, year and page range extraction on its own, checked against the per-line
+    # search it replaced over the whole cached corpus.
+    corpus = list(map(citation_lines, sources))
+    mismatches = sum(legacy_citation(lines) != current_citation(lines) for lines in corpus)
+    legacy, current = time_per_item([legacy_citation, current_citation], corpus,
+                                    repeat=repeat)
+    
+    return {'articles': len(corpus), 'mismatches': mismatches,
+            'legacy_us': legacy * 1e6, 'current_us': current * 1e6,
+            'speedup': legacy / current}
+
+def well_formed(xml: str) -> bool:
+    try:
+        ET.fromstring(xml.encode())
+    except ET.ParseError:
+        return False
+    
+    return True
+
+def best_of(func: Callable[[], object], *, repeat: int = 3) -> float:
+    best = float('inf')
+    
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    
+    return best
+
+def replicate(articles: list[Article], factor: int) -> list[Article]:
+    # Each copy gets its own volume numbers and author names, so ID assignment and volume
+    # grouping see factor times as many distinct keys rather than repeats of the same ones.
+    offset = max(article.volume for article in articles)
+    replicas = list(articles)
+    
+    for k in range(1, factor):
+        for article in articles:
+            replica = copy(article)
+            replica.volume += k * offset
+            replica.authors = tuple(f'{author}-{k}' for author in article.authors)
+            replicas.append(replica)
+    
+    return replicas
+
+def stub_registry(articles: list[Article], path: str = 'data') -> StubRegistry:
+    authors = dict.fromkeys(author for article in articles for author in article.authors)
+    volumes = dict.fromkeys(article.volume for article in articles)
+    return StubRegistry(path, {'author_ids': {author: author_id for author_id, author
+                                              in enumerate(authors, 1)},
+                               'volume_titles': {vol: str(vol) for vol in volumes},
+                               'pdf_sizes': {article.pdf_src: {'size': 100000}
+                                             for article in articles}})
+
+def bench_suite(sources: list[str], *, scale: int = 1, repeat: int = 3) -> dict:
+    # Stage throughput on the cached corpus replicated `scale` times. Times are per article
+    # (per author for ID assignment), so growth across scales points to superlinear code.
+    pages = sources * scale
+    parse = best_of(lambda: [Article(source) for source in pages], repeat=repeat)
+    
+    articles = sorted(map(Article, sources), key=lambda article: (article.volume,
+                                                                  article.start_page))
+    articles = replicate(articles, scale)
+    authors = [author for article in articles for author in article.authors]
+    registry = stub_registry(articles)
+    
+    with TemporaryDirectory() as path:
+        author_ids = best_of(lambda: save_author_ids(authors, path=path), repeat=repeat)
+    
+    volumes = group_volumes(articles, registry)
+    grouping = best_of(lambda: group_volumes(articles, registry), repeat=repeat)
+    validation = best_of(lambda: validate_volumes(volumes, registry, articles),
+                         repeat=repeat)
+    sink = ByteCounter()
+    render = best_of(lambda: [volume.write_XML(sink) for volume in volumes], repeat=repeat)
+    
+    return {'scale': scale, 'articles': len(articles), 'authors': len(authors),
+            'volumes': len(volumes), 'parse_us': parse / len(pages) * 1e6,
+            'author_ids_us': author_ids / len(authors) * 1e6,
+            'volumes_us': grouping / len(articles) * 1e6,
+            'validate_us': validation / len(articles) * 1e6,
+            'render_us': render / len(articles) * 1e6,
+            'render_mb_per_sec': sink.bytes / repeat / render / 1e6}
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_results(file: str) -> list[dict]:
+    if not exists(file):
+        return []
+    
+    with open(file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_result(result: dict, file: str) -> None:
+    # One JSON record per line, appended, so the file is the run history.
+    with open(file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result) + '\n')
+
+def bench_render(articles: list[Article], registry: MetadataRegistry, *,
+                 repeat: int = 20) -> dict:
+    legacy, current = time_per_item(
+        [lambda article: LegacyArticle.legacy_XML_block(article, 1, 0, None, registry),
+         lambda article: article.get_XML_bytes(1, 0, None, registry)],
+        articles, repeat=repeat)
+    
+    # Well-formedness is checked per article, wrapped in an <articles> root like a volume.
+    wrap = lambda block: f'<articles>{block}</articles>'
+    legacy_ok = sum(well_formed(wrap(LegacyArticle.legacy_XML_block(article, 1, 0, None,
+                                                                    registry)))
+                    for article in articles)
+    current_ok = sum(well_formed(wrap(article.get_XML_block(1, 0, None, registry)))
+                     for article in articles)
+    
+    return {'articles': len(articles), 'legacy_per_sec': 1 / legacy,
+            'current_per_sec': 1 / current, 'speedup': legacy / current,
+            'legacy_well_formed': legacy_ok, 'current_well_formed': current_ok}
+
+# %%
+TIMINGS = ['parse_us', 'author_ids_us', 'volumes_us', 'validate_us', 'render_us']
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Offline benchmarks over the cached TAC corpus.')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1],
+                        help='corpus replication factors for the suite (default: 1)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per timing (best kept)')
+    parser.add_argument('--results', default='benchmark_results.jsonl',
+                        help='JSON lines file to append results to and compare against')
+    parser.add_argument('--no-legacy', action='store_true',
+                        help='skip the comparisons against the legacy parser and renderer')
+    args = parser.parse_args()
+    sources = load_sources()
+    
+    if not args.no_legacy:
+        result = bench_parse(sources)
+        print(f"Parsed {result['articles']} articles ({result['mismatches']} mismatches)")
+        print(f"  legacy:  {result['legacy_us']:8.1f} us/article")
+        print(f"  current: {result['current_us']:8.1f} us/article")
+        print(f"  speedup: {result['speedup']:8.2f}x")
+        
+        result = bench_citation(sources)
+        print(f"Extracted citations from {result['articles']} articles "
+              f"({result['mismatches']} mismatches)")
+        print(f"  legacy:  {result['legacy_us']:8.2f} us/article")
+        print(f"  current: {result['current_us']:8.2f} us/article")
+        print(f"  speedup: {result['speedup']:8.2f}x")
+        
+        articles = [Article(source) for source in sources]
+        result = bench_render(articles, StubRegistry('data'))
+        print(f"Rendered {result['articles']} articles")
+        print(f"  legacy:  {result['legacy_per_sec']:8.0f} articles/s, "
+              f"{result['legacy_well_formed']} well-formed")
+        print(f"  current: {result['current_per_sec']:8.0f} articles/s, "
+              f"{result['current_well_formed']} well-formed")
+        print(f"  speedup: {result['speedup']:8.2f}x")
+    
+    history = load_results(args.results)
+    base = None
+    
+    for scale in args.scale:
+        result = bench_suite(sources, scale=scale, repeat=args.repeat)
+        result.update(date=dt.now().isoformat(timespec='seconds'), revision=git_revision(),
+                      python=platform.python_version())
+        previous = next((old for old in reversed(history) if old['scale'] == scale), None)
+        base = base or result
+        
+        print(f"Suite at {scale}x: {result['articles']} articles, {result['authors']} "
+              f"authors, {result['volumes']} volumes")
+        
+        for key in TIMINGS:
+            line = f'  {key:14} {result[key]:8.2f} us'
+            
+            if result is not base:
+                line += f"  ({result[key] / base[key]:.2f}x per item vs {base['scale']}x)"
+            if previous and key in previous:
+                line += f"  ({result[key] / previous[key]:.2f}x vs {previous['revision']})"
+            
+            print(line)
+        
+        print(f"  render         {result['render_mb_per_sec']:8.1f} MB/s")
+        save_result(result, args.results)
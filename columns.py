@@ -0,0 +1,73 @@
+# %%
+import gzip
+import pickle
+
+from array import array
+from collections import Counter
+from itertools import accumulate, chain
+from publications import Article
+from typing import Iterable
+
+# %%
+class ArticleTable:
+    # The whole journal as typed columns, one row per article. Authors and keywords are
+    # stored CSR-style: a flat array of codes into a table of distinct strings, plus
+    # offsets so that row i owns codes[offsets[i]:offsets[i + 1]].
+    def __init__(self, articles: Iterable[Article]):
+        articles = list(articles)
+        self.pdf_src = [article.pdf_src for article in articles]
+        self.title = [article.title for article in articles]
+        self.volume = array('H', (article.volume for article in articles))
+        self.year = array('H', (article.year for article in articles))
+        self.start_page = array('I', (article.start_page for article in articles))
+        self.end_page = array('I', (article.end_page for article in articles))
+        self.author_names, self.author_codes, self.author_offsets = \
+            encode([article.authors for article in articles])
+        self.keyword_names, self.keyword_codes, self.keyword_offsets = \
+            encode([article.keywords for article in articles])
+    
+    def __len__(self) -> int:
+        return len(self.volume)
+    
+    def save(self, file: str) -> None:
+        with gzip.open(file, 'wb') as f:
+            pickle.dump(self, f)
+    
+    @staticmethod
+    def load(file: str):
+        with gzip.open(file, 'rb') as f:
+            return pickle.load(f)
+    
+    def authors(self, row: int) -> list[str]:
+        codes = self.author_codes[self.author_offsets[row]:self.author_offsets[row + 1]]
+        return [self.author_names[code] for code in codes]
+    
+    def author_counts(self) -> dict[str, int]:
+        # Counter consumes the code array in C; names are only looked up once per author.
+        counts = Counter(self.author_codes)
+        return {self.author_names[code]: count for code, count in counts.most_common()}
+    
+    def authors_per_article(self) -> array:
+        offsets = self.author_offsets
+        return array('I', map(int.__sub__, offsets[1:], offsets[:-1]))
+    
+    def page_counts(self) -> array:
+        return array('I', (end - start + 1 for start, end
+                           in zip(self.start_page, self.end_page)))
+    
+    def pages_per_volume(self) -> dict[int, int]:
+        pages = Counter()
+        
+        for volume, count in zip(self.volume, self.page_counts()):
+            pages[volume] += count
+        
+        return dict(sorted(pages.items()))
+    
+    def articles_per_volume(self) -> dict[int, int]:
+        return dict(sorted(Counter(self.volume).items()))
+
+def encode(rows: list[tuple[str, ...]]) -> tuple[list[str], array, array]:
+    names = {}
+    codes = array('I', (names.setdefault(name, len(names)) for name in chain(*rows)))
+    offsets = array('I', accumulate(map(len, rows), initial=0))
+    return list(names), codes, offsets
@@ -0,0 +1,36 @@
+# %%
+import json
+
+from functools import cache
+from os.path import dirname, exists, join
+
+# %%
+class Corrections:
+    def __init__(self, entries: list[dict]):
+        self.fixes = {self.key(entry['title'], entry['authors']): entry['fields']
+                      for entry in entries}
+    
+    def __len__(self) -> int:
+        return len(self.fixes)
+    
+    @classmethod
+    def load(cls, file: str):
+        if not exists(file):
+            return cls([])
+        
+        with open(file, encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    @staticmethod
+    @cache
+    def shipped():
+        return Corrections.load(join(dirname(__file__), 'data', 'corrections.json'))
+    
+    @staticmethod
+    def key(title: str, authors: list[str]) -> tuple[str, ...]:
+        # Case and spacing differences in the TAC HTML (e.g. an all-caps title) still match.
+        return (' '.join(title.split()).casefold(),
+                *(' '.join(author.split()).casefold() for author in authors))
+    
+    def lookup(self, title: str, authors: list[str]) -> dict:
+        return self.fixes.get(self.key(title, authors), {})
@@ -0,0 +1,287 @@
+# %%
+import json
+import requests
+import sqlite3
+import threading
+import time
+import zlib
+
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os import makedirs
+from os.path import dirname
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from tempfile import TemporaryDirectory
+from typing import Callable, Iterable, Optional, Union
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHED_METHODS = {'GET', 'HEAD'}
+
+# %%
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+    
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        
+        host = urlsplit(url).netloc
+        
+        # Reserve the next free slot for this host, then sleep outside the lock so other
+        # hosts (and later slots for the same host) are not held up by this thread.
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        
+        if slot > now:
+            time.sleep(slot - now)
+
+# %%
+class HTTPCache:
+    # Last good response per (method, URL), kept between runs for conditional requests and
+    # offline replay. URLs already fetched or revalidated by this instance are served
+    # straight from it, so a page several stages need (the site index) is fetched once.
+    def __init__(self, file: str = 'data/http_cache.sqlite'):
+        if dirname(file) != '':
+            makedirs(dirname(file), exist_ok = True)
+        
+        self.db = sqlite3.connect(file, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS responses (method TEXT, url TEXT, '
+                        'headers TEXT NOT NULL, body BLOB NOT NULL, '
+                        'PRIMARY KEY (method, url))')
+        self.lock = threading.Lock()
+        self.fresh = set()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+    
+    def close(self) -> None:
+        self.db.close()
+    
+    def get(self, method: str, url: str) -> Optional[requests.Response]:
+        with self.lock:
+            row = self.db.execute('SELECT headers, body FROM responses '
+                                  'WHERE method = ? AND url = ?', (method, url)).fetchone()
+        
+        if row is None:
+            return None
+        
+        response = requests.Response()
+        response.status_code, response.reason, response.url = 200, 'OK', url
+        response.headers = CaseInsensitiveDict(json.loads(row[0]))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = zlib.decompress(row[1])
+        return response
+    
+    def put(self, method: str, url: str, response: requests.Response) -> None:
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                            (method, url, json.dumps(dict(response.headers)),
+                             zlib.compress(response.content)))
+            self.fresh.add((method, url))
+
+# %%
+class Fetcher:
+    def __init__(self, *, max_workers: int = 8, rate: float = 10.0, retries: int = 3,
+                 backoff: float = 0.5, timeout: float = 30.0,
+                 session: Optional[requests.Session] = None,
+                 stats: Optional[Counter] = None, cache: Optional[HTTPCache] = None,
+                 offline: bool = False):
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.stats = Counter() if stats is None else stats
+        self.stats_lock = threading.Lock()
+        self.cache = cache
+        self.offline = offline
+        
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.session.close()
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        cache = self.cache if method in CACHED_METHODS else None
+        cached = cache.get(method, url) if cache is not None else None
+        
+        if cached is not None and (self.offline or (method, url) in cache.fresh):
+            self.count(replayed=1)
+            return cached
+        if self.offline:
+            raise LookupError(f'{method} {url} is not in the HTTP cache (offline mode).')
+        
+        if cached is not None:
+            # The caller's own validators, if any, take precedence.
+            headers = dict(kwargs.get('headers') or {})
+            
+            if 'ETag' in cached.headers:
+                headers.setdefault('If-None-Match', cached.headers['ETag'])
+            if 'Last-Modified' in cached.headers:
+                headers.setdefault('If-Modified-Since', cached.headers['Last-Modified'])
+            
+            kwargs['headers'] = headers
+        
+        response = self.send(method, url, **kwargs)
+        
+        if cache is not None:
+            if response.status_code == 304 and cached is not None:
+                cache.fresh.add((method, url))
+                return cached
+            if response.status_code == 200:
+                cache.put(method, url, response)
+        
+        return response
+    
+    def send(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(url)
+            
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.count(errors=1, retries=attempt < self.retries)
+                
+                if attempt == self.retries:
+                    raise
+            else:
+                retry = response.status_code in RETRY_STATUSES and attempt < self.retries
+                self.count(requests=1, bytes=len(response.content), retries=retry,
+                           not_modified=response.status_code == 304)
+                
+                if not retry:
+                    response.raise_for_status()
+                    return response
+            
+            time.sleep(self.backoff * 2 ** attempt)
+    
+    def count(self, **counts: int) -> None:
+        with self.stats_lock:
+            self.stats.update({key: int(count) for key, count in counts.items()})
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+    
+    def map(self, method: str, urls: Iterable[str], *,
+            headers_for: Optional[Callable[[str], dict]] = None,
+            **kwargs) -> list[Union[requests.Response, Exception]]:
+        # A URL that still fails after its retries gives its exception in place of a
+        # response, so one dead link does not discard the rest of the batch.
+        def request(url: str) -> Union[requests.Response, Exception]:
+            try:
+                if headers_for:
+                    return self.request(method, url, headers=headers_for(url), **kwargs)
+                
+                return self.request(method, url, **kwargs)
+            except (requests.RequestException, LookupError) as error:
+                self.count(failed=1)
+                return error
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # executor.map yields in submission order, so output order matches `urls`
+            # regardless of which responses come back first.
+            return list(executor.map(request, urls))
+    
+    def get_all(self, urls: Iterable[str], **kwargs) -> list[Union[str, Exception]]:
+        return [response if isinstance(response, Exception) else response.text
+                for response in self.map('GET', urls, **kwargs)]
+
+# %%
+class FlakyHandler(SimpleHTTPRequestHandler):
+    # Serves a directory, but answers 503 to the first two requests for flaky.html.
+    failures = Counter()
+    
+    def do_GET(self):
+        if self.path == '/flaky.html' and self.failures[self.path] < 2:
+            self.failures[self.path] += 1
+            self.send_error(503)
+        else:
+            super().do_GET()
+    
+    def log_message(self, *args) -> None:
+        pass
+
+def selftest() -> None:
+    # End to end against a local http.server stand-in: a first crawl, a refresh that is
+    # all 304s, retries on a flaky page, and offline replay with the server stopped.
+    with TemporaryDirectory() as root:
+        makedirs(f'{root}/site')
+        pages = {f'page{i}.html': f'<html>page {i}</html>' for i in range(5)}
+        pages['flaky.html'] = '<html>flaky</html>'
+        
+        for name, text in pages.items():
+            with open(f'{root}/site/{name}', 'w', encoding='utf-8') as f:
+                f.write(text)
+        
+        FlakyHandler.failures.clear()
+        handler = partial(FlakyHandler, directory=f'{root}/site')
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        site = f'http://127.0.0.1:{server.server_port}/'
+        urls = [f'{site}{name}' for name in pages]
+        
+        try:
+            with HTTPCache(f'{root}/http_cache.sqlite') as cache, \
+                 Fetcher(cache=cache, rate=0, backoff=0) as fetcher:
+                assert fetcher.get_all(urls) == list(pages.values())
+                assert fetcher.stats['requests'] == len(urls) + 2
+                assert fetcher.stats['retries'] == 2
+                assert len(cache) == len(urls)
+            
+            # A new cache instance has nothing marked fresh, so every URL is revalidated.
+            with HTTPCache(f'{root}/http_cache.sqlite') as cache, \
+                 Fetcher(cache=cache, rate=0, backoff=0) as fetcher:
+                assert fetcher.get_all(urls) == list(pages.values())
+                assert fetcher.stats['not_modified'] == len(urls)
+                assert fetcher.stats['requests'] == len(urls)
+                assert fetcher.stats['bytes'] == 0
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        with HTTPCache(f'{root}/http_cache.sqlite') as cache, \
+             Fetcher(cache=cache, offline=True) as fetcher:
+            assert fetcher.get_all(urls) == list(pages.values())
+            assert fetcher.stats['replayed'] == len(urls) and not fetcher.stats['requests']
+            assert isinstance(fetcher.get_all([f'{site}missing.html'])[0], LookupError)
+    
+    print(f'HTTP cache self-test passed ({len(urls)} pages).')
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='HTTP fetching with a shared cache.')
+    parser.add_argument('--selftest', action='store_true',
+                        help='check caching, 304s, retries and offline replay against a '
+                             'local http.server')
+    args = parser.parse_args()
+    
+    if args.selftest:
+        selftest()
+    else:
+        parser.print_help()
+
@@ -0,0 +1,120 @@
+# %%
+import cProfile
+import json
+import pstats
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+
+# %%
+class Instrumentation:
+    def __init__(self, *, profile: bool = False):
+        self.stages = {}
+        self.methods = {}
+        self.slowest = []
+        self.profiler = cProfile.Profile() if profile else None
+        self.depth = 0
+        self.started = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Counter]:
+        # Stages may nest (e.g. a render that has to parse first), so the profiler is only
+        # switched on and off by the outermost one.
+        entry = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0,
+                                              'counters': Counter()})
+        
+        if self.profiler and not self.depth:
+            self.profiler.enable()
+        
+        self.depth += 1
+        start = time.perf_counter()
+        
+        try:
+            yield entry['counters']
+        finally:
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            self.depth -= 1
+            
+            if self.profiler and not self.depth:
+                self.profiler.disable()
+    
+    @contextmanager
+    def timed_methods(self, cls: type, names: list[str]) -> Iterator[None]:
+        # Wraps the methods on the class itself, so only calls made in this process are
+        # seen; callers should parse serially while this is active.
+        originals = {name: cls.__dict__[name] for name in names}
+        
+        def timed(name: str, method):
+            times = self.methods.setdefault(name, [])
+            
+            def wrapper(obj, *args, **kwargs):
+                start = time.perf_counter()
+                
+                try:
+                    return method(obj, *args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    times.append(elapsed)
+                    
+                    if name == '__init__':
+                        self.slowest.append((elapsed, obj))
+            
+            return wrapper
+        
+        for name, method in originals.items():
+            setattr(cls, name, timed(name, method))
+        
+        try:
+            yield
+        finally:
+            for name, method in originals.items():
+                setattr(cls, name, method)
+    
+    def report(self, *, top: int = 25) -> dict:
+        report = {'seconds': round(time.perf_counter() - self.started, 6), 'stages': {}}
+        
+        for name, entry in self.stages.items():
+            counters = dict(entry['counters'])
+            hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+            
+            if hits + misses:
+                counters['hit_rate'] = round(hits / (hits + misses), 4)
+            
+            report['stages'][name] = {'seconds': round(entry['seconds'], 6),
+                                      'calls': entry['calls'], **counters}
+        
+        if self.methods:
+            report['methods'] = {name: summarize(times)
+                                 for name, times in self.methods.items() if times}
+            report['slowest_articles'] = [
+                {'seconds': round(elapsed, 6), 'title': getattr(article, 'title', None),
+                 'volume': getattr(article, 'volume', None)}
+                for elapsed, article in sorted(self.slowest, key=lambda item: -item[0])[:5]]
+        
+        if self.profiler:
+            stats = pstats.Stats(self.profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:top]
+            report['profile'] = [{'function': f'{file}:{line}({func})', 'calls': nc,
+                                  'tottime': round(tt, 6), 'cumtime': round(ct, 6)}
+                                 for (file, line, func), (_, nc, tt, ct, _) in rows]
+        
+        return report
+    
+    def save(self, file: str) -> None:
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+    
+    def dump_profile(self, file: str) -> None:
+        # Raw cProfile output, for snakeviz/pstats when the top-N summary is not enough.
+        self.profiler.dump_stats(file)
+
+def summarize(times: list[float]) -> dict:
+    ordered = sorted(times)
+    
+    return {'calls': len(ordered), 'seconds': round(sum(ordered), 6),
+            'mean_us': round(1e6 * sum(ordered) / len(ordered), 2),
+            'p95_us': round(1e6 * ordered[int(0.95 * (len(ordered) - 1))], 2),
+            'max_us': round(1e6 * ordered[-1], 2)}
@@ -1,34 +1,330 @@
 # %%
 import gzip
+import json
 import pickle
 import re
-import requests
 
-from publications import Article, Volume # Relative imports from publications.py
-from os import makedirs
+from argparse import ArgumentParser
+from author_index import AuthorIndex, load_aliases
+from collections import Counter
+from columns import ArticleTable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from corrections import Corrections
+from functools import partial
+from glob import glob
+from instrumentation import Instrumentation
+from manifest import BuildManifest
+from publications import ISSUE, Article, Volume # Relative imports from publications.py
+from registry import MetadataRegistry
+from shards import plan_shards, save_plan
+from source_store import SourceStore
+from os import cpu_count, makedirs, remove
+from os.path import basename, exists, getsize
+from typing import Iterable, Optional, Union
+from validation import ValidationReport, load_table, validate_files, validate_volumes
+
+# Network stages import requests (via fetch.py) inside the functions that need it, so
+# importing this module or running offline stages never loads the HTTP stack.
+
+SITE = 'http://www.tac.mta.ca/tac/'
+PAGE_TITLE = re.compile(r'<title>(.*?)</title>', re.S)
+WHITESPACE = re.compile(r'\s+')
+STAGES = ['titles', 'sources', 'parse', 'authors', 'sizes', 'render', 'validate',
+          'columns']
+PARSE_METHODS = ['__init__', '__parse__', '__set_pdf_src__', '__set_title__',
+                 '__set_authors__', '__set_abstract__', '__set_keywords__',
+                 '__set_issue_ident__', '__set_page_range__']
+
+# %%
+class Pipeline:
+    def __init__(self, *, path: str = 'data', site: str = SITE, workers: int = 1,
+                 offline: bool = False, incremental: bool = True, refresh: bool = False,
+                 revalidate: bool = False, compress: bool = False,
+                 stats: Optional[Instrumentation] = None, time_articles: bool = False,
+                 schema: Optional[str] = None, shard_articles: Optional[int] = None,
+                 shard_bytes: Optional[int] = None):
+        self.path = path
+        self.site = site
+        self.workers = workers
+        self.offline = offline
+        self.refresh = refresh
+        self.revalidate = revalidate
+        self.compress = compress
+        self.manifest = BuildManifest(path) if incremental else None
+        self.articles = None
+        self.stats = stats or Instrumentation()
+        self.time_articles = time_articles
+        self.schema = schema
+        self.shard_articles = shard_articles
+        self.shard_bytes = shard_bytes
+        self.sharded = bool(shard_articles or shard_bytes)
+        self.report = None
+        self.parse_report = ValidationReport()
+        self.fetch_report = ValidationReport()
+        self.fetcher = None
+        # Offline runs replay recorded responses when there are any; otherwise the network
+        # stages are skipped and later stages use what is already in the data directory.
+        self.http_cache = f'{path}/http_cache.sqlite'
+        self.network = not offline or exists(self.http_cache)
+    
+    def run(self, stages: Iterable[str] = STAGES) -> None:
+        stages = set(stages)
+        unknown = stages.difference(STAGES)
+        
+        if unknown:
+            raise ValueError(f'Unknown stages: {", ".join(sorted(unknown))}.')
+        
+        run_stage = {'titles': self.fetch_titles, 'sources': self.fetch_sources,
+                     'parse': self.parse, 'authors': self.assign_author_ids,
+                     'sizes': self.resolve_pdf_sizes, 'render': self.render,
+                     'validate': self.validate, 'columns': self.export_columns}
+        
+        # Stages always run in pipeline order; later stages pick up whatever earlier runs
+        # left in the data directory.
+        try:
+            for stage in STAGES:
+                if stage in stages:
+                    run_stage[stage]()
+        finally:
+            if self.fetcher:
+                self.fetcher.cache.close()
+                self.fetcher.session.close()
+                self.fetcher = None
+        
+        if self.manifest:
+            with self.stats.stage('manifest'):
+                self.manifest.save()
+    
+    def get_fetcher(self, stats: Counter):
+        # One fetcher (and HTTP cache) serves every network stage of a run; each stage
+        # gets its own counters.
+        if self.fetcher is None:
+            from fetch import Fetcher, HTTPCache
+            
+            self.fetcher = Fetcher(cache=HTTPCache(self.http_cache), offline=self.offline)
+        
+        self.fetcher.stats = stats
+        return self.fetcher
+    
+    def fetch_titles(self) -> None:
+        if self.network:
+            with self.stats.stage('titles') as stats:
+                save_volume_titles(path=self.path, site=self.site,
+                                   fetcher=self.get_fetcher(stats))
+    
+    def fetch_sources(self) -> None:
+        if self.network:
+            with self.stats.stage('sources') as stats:
+                failed = save_sources(path=self.path, site=self.site, refresh=self.refresh,
+                                      fetcher=self.get_fetcher(stats))
+            
+            for url, error in failed.items():
+                self.fetch_report.add('fetch', error, file=url)
+    
+    def parse(self) -> list[Article]:
+        with self.stats.stage('parse') as stats:
+            with self.stats.stage('parse/load'):
+                sources = load_sources(path=self.path)
+            
+            self.parse_report = ValidationReport()
+            
+            if self.time_articles:
+                # Method timings are collected in this process, so parse serially. Pages
+                # served from the manifest are not re-parsed and so are not timed either.
+                with self.stats.timed_methods(Article, PARSE_METHODS):
+                    articles = parse_articles(sources, manifest=self.manifest, stats=stats,
+                                              report=self.parse_report)
+            else:
+                articles = parse_articles(sources, workers=self.workers,
+                                          manifest=self.manifest, stats=stats,
+                                          report=self.parse_report)
+            
+            self.articles = sorted(articles, key=lambda article: (article.volume,
+                                                                  article.start_page))
+        
+        return self.articles
+    
+    def get_articles(self) -> list[Article]:
+        return self.parse() if self.articles is None else self.articles
+    
+    def new_report(self) -> ValidationReport:
+        # Pages that failed to download or parse are reported (a parse failure also flags
+        # its volume) alongside the volume checks.
+        report = ValidationReport()
+        report.extend(self.fetch_report.problems)
+        report.extend(self.parse_report.problems)
+        return report
+    
+    def assign_author_ids(self) -> None:
+        articles = self.get_articles()
+        
+        # Generators, so no flattened copy of the author lists is built alongside articles.
+        with self.stats.stage('authors') as stats:
+            save_author_ids((author for article in articles for author in article.authors),
+                            path=self.path,
+                            aliases=load_aliases(f'{self.path}/author_aliases.json'))
+            index = AuthorIndex(author for article in articles
+                                for author in article.authors)
+            index.write_report(f'{self.path}/author_review.csv')
+            stats.update(authors=len(index.names))
+    
+    def resolve_pdf_sizes(self) -> None:
+        articles = self.get_articles()
+        
+        with self.stats.stage('sizes') as stats:
+            save_pdf_sizes([article.pdf_src for article in articles], path=self.path,
+                           revalidate=self.revalidate, offline=not self.network,
+                           fetcher=self.get_fetcher(stats) if self.network else None,
+                           stats=stats)
+    
+    def render(self) -> None:
+        articles = self.get_articles()
+        
+        with self.stats.stage('render') as stats:
+            if self.sharded:
+                self.report = save_shards(articles, path=self.path, workers=self.workers,
+                                          max_articles=self.shard_articles,
+                                          max_bytes=self.shard_bytes,
+                                          compress=self.compress, stats=stats,
+                                          report=self.new_report())
+            else:
+                self.report = save_metadata(articles, path=self.path, workers=self.workers,
+                                            manifest=self.manifest, compress=self.compress,
+                                            stats=stats, report=self.new_report())
+            
+            self.report.save(f'{self.path}/validation.json')
+    
+    def validate(self) -> ValidationReport:
+        articles = self.get_articles()
+        
+        with self.stats.stage('validate') as stats:
+            registry = MetadataRegistry(self.path)
+            
+            if self.report is None:
+                self.report = self.new_report()
+                volume_titles = load_table(registry, 'volume_titles', self.report)
+                validate_volumes(group_volumes(articles, registry, volume_titles), registry,
+                                 articles, self.report)
+            
+            if self.sharded:
+                # Shards can mix volumes, so their problems are reported by file only.
+                with open(f'{self.path}/xml_shards/manifest.json', encoding='utf-8') as f:
+                    files = [shard['file'] for shard in json.load(f)['shards']]
+                
+                files = [f'{self.path}/xml_shards/{file}' for file in files]
+                validate_files(files, schema=self.schema, workers=self.workers,
+                               report=self.report)
+            else:
+                files = {vol: f'{self.path}/xml_files/TAC_vol{vol}.xml'
+                         for vol in load_table(registry, 'volume_titles', self.report)}
+                files = {vol: file for vol, file in files.items() if exists(file)}
+                validate_files(files, schema=self.schema, workers=self.workers,
+                               report=self.report)
+            self.report.save(f'{self.path}/validation.json')
+            stats.update(files=len(files), problems=len(self.report.problems))
+        
+        return self.report
+    
+    def export_columns(self) -> ArticleTable:
+        articles = self.get_articles()
+        
+        with self.stats.stage('columns'):
+            table = ArticleTable(articles)
+            table.save(f'{self.path}/articles.gz')
+        
+        return table
+
+# %%
+def load_sources(*, path: str = '') -> list[str]:
+    if exists(f'{path}/sources.sqlite'):
+        with SourceStore(f'{path}/sources.sqlite') as store:
+            return list(store.sources())
+    
+    # Before the first crawl, fall back to the frozen corpus in sources.gz.
+    with gzip.open(f'{path}/sources.gz', 'rb') as f:
+        return pickle.load(f)
 
 # %%
-def main():
-    save_volume_titles(path='data')
-    save_sources(path='data')
+def parse_articles(sources: list[str], *, workers: int = 1, chunksize: int = 64,
+                   manifest: Optional[BuildManifest] = None,
+                   corrections: Optional[Corrections] = None,
+                   stats: Optional[Counter] = None,
+                   report: Optional[ValidationReport] = None) -> list[Article]:
+    parse = partial(parse_page, corrections=corrections)
     
-    with gzip.open('data/sources.gz', 'rb') as f:
-        sources = pickle.load(f)
+    if manifest is None:
+        pending = sources
+    else:
+        hashes = [manifest.page_hash(source) for source in sources]
+        pending = [source for source, page_hash in zip(sources, hashes)
+                   if page_hash not in manifest.pages]
     
-    articles = [Article(source) for source in sources]
-    articles = sorted(articles, key=lambda article: (article.volume, article.start_page))
+    if stats is not None:
+        stats.update(articles=len(sources), hits=len(sources) - len(pending),
+                     misses=len(pending))
     
-    author_lists = [article.authors for article in articles]
-    authors = [author for author_list in author_lists for author in author_list]
-    save_author_ids(authors, path='data')
-    save_metadata(articles, path='data')
+    if workers == 1:
+        parsed = [parse(source) for source in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(parse, pending, chunksize=chunksize))
+    
+    # A page the parser rejects is reported and left out (and not cached, so it is tried
+    # again next run) instead of stopping the run.
+    failed = [(source, error) for source, error in zip(pending, parsed)
+              if isinstance(error, str)]
+    
+    if report is not None:
+        for source, error in failed:
+            match = PAGE_TITLE.search(source)
+            title = WHITESPACE.sub(' ', match[1]).strip() if match else 'A page'
+            report.add('parse', f'{title!r} could not be parsed: {error}',
+                       volume=page_volume(source))
+    
+    if stats is not None:
+        stats.update(failed=len(failed))
+    
+    if manifest is None:
+        return [article for article in parsed if isinstance(article, Article)]
+    
+    # Pages that disappeared upstream are dropped so the manifest mirrors the current crawl.
+    cached = manifest.pages
+    cached.update((page_hash, article)
+                  for page_hash, article in zip(map(manifest.page_hash, pending), parsed)
+                  if isinstance(article, Article))
+    manifest.pages = {page_hash: cached[page_hash] for page_hash in hashes
+                      if page_hash in cached}
+    return [manifest.pages[page_hash] for page_hash in hashes
+            if page_hash in manifest.pages]
+
+def parse_page(source: str,
+               corrections: Optional[Corrections] = None) -> Union[Article, str]:
+    # Module level so that worker processes can unpickle it; errors come back as text.
+    try:
+        return Article(source, corrections)
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
 
 # %%
-def save_volume_titles(*, path: str = '') -> None:
+def open_fetcher(fetcher=None, **kwargs):
+    # A fetcher passed in belongs to the caller and is left open; otherwise a new one is
+    # made (and closed) for just this call.
+    if fetcher is not None:
+        return nullcontext(fetcher)
+    
+    from fetch import Fetcher
+    
+    return Fetcher(**kwargs)
+
+def save_volume_titles(*, path: str = '', site: str = SITE, fetcher=None,
+                       stats: Optional[Counter] = None) -> None:
     if path != '':
         makedirs(path, exist_ok = True)
     
-    source = requests.get('http://www.tac.mta.ca/tac/').text
+    with open_fetcher(fetcher, stats=stats) as fetcher:
+        source = fetcher.get(site).text
+    
     source_iter = (line.strip() for line in source.split('\n'))
     
     reg = re.compile(r'Vol[.] \d+')
@@ -47,67 +343,309 @@ def save_volume_titles(*, path: str = '') -> None:
         pickle.dump(volume_titles, f)
 
 # %%
-def save_sources(*, path: str = '') -> None:
+def save_sources(*, path: str = '', site: str = SITE, max_workers: int = 8,
+                 rate: float = 10.0, retries: int = 3, refresh: bool = False, fetcher=None,
+                 stats: Optional[Counter] = None) -> dict[str, str]:
     if path != '':
         makedirs(path, exist_ok = True)
     
-    site = 'http://www.tac.mta.ca/tac/'
+    # With an HTTP cache, refreshing stored pages costs conditional requests (mostly 304s),
+    # not full downloads.
+    with SourceStore(f'{path}/sources.sqlite') as store, \
+         open_fetcher(fetcher, max_workers=max_workers, rate=rate, retries=retries,
+                      stats=stats) as fetcher:
+        site_source = [line.strip() for line in fetcher.get(site).text.split('\n')]
+        links = sorted({line.split('"')[1] for line in site_source if 'abs.html' in line})
+        urls = [f'{site}{link}' for link in links]
+        # Pages no longer linked from the index (withdrawn or moved) are dropped, so they
+        # are not parsed and rendered again from an old copy.
+        dropped = set(store.urls()).difference(urls)
+        store.discard(dropped)
+        pending = [url for url in urls if refresh or url not in store]
+        fetcher.count(hits=len(urls) - len(pending), misses=len(pending),
+                      dropped=len(dropped))
+        sources = fetcher.get_all(pending)
+        # Pages that failed are left out of the store, so the next run fetches them again.
+        store.put_many((url, source, page_volume(source))
+                       for url, source in zip(pending, sources)
+                       if not isinstance(source, Exception))
     
-    with requests.Session() as session:
-        site_source = [line.strip() for line in session.get(site).text.split('\n')]
-        links = {line.split('"')[1] for line in site_source if 'abs.html' in line}
-        sources = [session.get(f'{site}{link}').text for link in links]
-    
-    with gzip.open(f'{path}/sources.gz', 'wb') as f:
-        pickle.dump(sources, f)
+    return {url: str(error) for url, error in zip(pending, sources)
+            if isinstance(error, Exception)}
+
+def page_volume(source: str) -> Optional[int]:
+    # Only the store's volume key, read from the first 'Vol. n, year' without parsing the
+    # whole page; a page without one is stored with no volume.
+    match = ISSUE.search(source)
+    return int(match[1]) if match else None
 
 # %%
-def save_author_ids(authors: list[str], *, path: str = '') -> None:
+def save_author_ids(authors: Iterable[str], *, path: str = '',
+                    aliases: Optional[dict[str, str]] = None) -> None:
     if path != '':
         makedirs(path, exist_ok = True)
     
+    aliases = aliases or {}
     author_ids = {}
     author_id = 1
     
+    # Reviewed variants (see author_index.py) take the ID of their canonical spelling.
     for author in authors:
         if author not in author_ids:
-            author_ids[author] = author_id
-            author_id += 1
+            canonical = aliases.get(author, author)
+            
+            if canonical not in author_ids:
+                author_ids[canonical] = author_id
+                author_id += 1
+            
+            author_ids[author] = author_ids[canonical]
     
     with gzip.open(f'{path}/author_ids.gz', 'wb') as f:
         pickle.dump(author_ids, f)
 
 # %%
-def save_metadata(articles: list, *, path: str = '') -> None:
+def save_pdf_sizes(urls: list[str], *, path: str = '', revalidate: bool = False,
+                   offline: bool = False, fetcher=None, max_workers: int = 8,
+                   rate: float = 10.0, stats: Optional[Counter] = None) -> dict[str, int]:
+    if path != '':
+        makedirs(path, exist_ok = True)
+    
+    cache = {}
+    
+    if exists(f'{path}/pdf_sizes.gz'):
+        with gzip.open(f'{path}/pdf_sizes.gz', 'rb') as f:
+            cache = pickle.load(f)
+    
+    # Cached sizes are trusted as-is unless revalidation is requested, in which case each
+    # cached URL gets a conditional HEAD and only changed files (non-304s) are updated.
+    pending = list(dict.fromkeys(url for url in urls if revalidate or url not in cache))
+    
+    if offline:
+        missing = [url for url in pending if url not in cache]
+        
+        if missing:
+            raise LookupError(f'{len(missing)} PDF sizes are not cached '
+                              f'(e.g. {missing[0]}); rerun without offline mode.')
+        
+        pending = []
+    
+    if stats is not None:
+        stats.update(hits=len(set(urls)) - len(pending), misses=len(pending))
+    
+    def headers(url: str) -> dict[str, str]:
+        entry = cache.get(url, {})
+        conditions = {}
+        
+        if entry.get('etag'):
+            conditions['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditions['If-Modified-Since'] = entry['last_modified']
+        
+        return conditions
+    
+    if pending:
+        with open_fetcher(fetcher, max_workers=max_workers, rate=rate,
+                          stats=stats) as fetcher:
+            responses = fetcher.map('HEAD', pending, headers_for=headers)
+        
+        # URLs that failed or gave no size are skipped (and tried again next run); the
+        # pdf_sizes check in validate_volumes reports the articles left without one.
+        for url, response in zip(pending, responses):
+            if isinstance(response, Exception) or response.status_code == 304:
+                continue
+            if 'Content-Length' not in response.headers:
+                if stats is not None:
+                    stats.update(no_size=1)
+                
+                continue
+            
+            cache[url] = {'size': int(response.headers['Content-Length']),
+                          'etag': response.headers.get('ETag'),
+                          'last_modified': response.headers.get('Last-Modified')}
+        
+        with gzip.open(f'{path}/pdf_sizes.gz', 'wb') as f:
+            pickle.dump(cache, f)
+    
+    return {url: cache[url]['size'] for url in urls if url in cache}
+
+# %%
+def save_metadata(articles: list, *, path: str = '',
+                  registry: Optional[MetadataRegistry] = None, workers: int = 1,
+                  manifest: Optional[BuildManifest] = None, compress: bool = False,
+                  stats: Optional[Counter] = None,
+                  report: Optional[ValidationReport] = None) -> ValidationReport:
     if path != '':
         makedirs(f'{path}/xml_files', exist_ok = True)
     
-    with gzip.open('data/volume_titles.gz', 'rb') as f:
-        vol_nums = pickle.load(f).keys()
+    registry = registry or MetadataRegistry(path or '.')
+    report = ValidationReport() if report is None else report
+    volume_titles = load_table(registry, 'volume_titles', report)
+    volumes = group_volumes(articles, registry, volume_titles)
+    report = validate_volumes(volumes, registry, articles, report)
+    invalid = report.invalid_volumes()
+    
+    # File IDs are fixed by group_volumes, in volume order, so rendering can run in any
+    # order (or in parallel) and still produce the same output as a serial run. Volumes
+    # with problems are left out (and stay stale in the manifest) until they are fixed.
+    valid = [volume for volume in volumes if volume.volume not in invalid]
+    files = [f'{path}/xml_files/TAC_vol{volume.volume}.xml' for volume in valid]
+    stale = [(volume, file) for volume, file in zip(valid, files)
+             if manifest is None or manifest.volume_changed(volume, file)
+             or (compress and not exists(f'{file}.gz'))]
     
-    metadata = [''] * len(vol_nums)
-    article_iter = iter(articles)
-    article = next(article_iter)
+    write_all([volume for volume, _ in stale], [file for _, file in stale],
+              registry=registry, workers=workers, compress=compress)
+    
+    if manifest:
+        for volume, _ in stale:
+            manifest.mark_rendered(volume)
+    
+    if stats is not None:
+        stats.update(volumes=len(volumes), invalid=len(invalid),
+                     hits=len(valid) - len(stale), misses=len(stale),
+                     bytes=sum(getsize(file) for _, file in stale))
+    
+    return report
+
+def save_shards(articles: list, *, path: str = '',
+                registry: Optional[MetadataRegistry] = None, workers: int = 1,
+                max_articles: Optional[int] = None, max_bytes: Optional[int] = None,
+                compress: bool = False, stats: Optional[Counter] = None,
+                report: Optional[ValidationReport] = None) -> ValidationReport:
+    directory = f'{path or "."}/xml_shards'
+    makedirs(directory, exist_ok = True)
+    
+    registry = registry or MetadataRegistry(path or '.')
+    report = ValidationReport() if report is None else report
+    volume_titles = load_table(registry, 'volume_titles', report)
+    volumes = group_volumes(articles, registry, volume_titles)
+    report = validate_volumes(volumes, registry, articles, report)
+    invalid = report.invalid_volumes()
+    
+    # The plan is cut from the per-volume file IDs, so IDs do not depend on the batch size
+    # and every shard is self-contained: they render in parallel and import in any order.
+    shards = plan_shards([volume for volume in volumes if volume.volume not in invalid],
+                         max_articles=max_articles, max_bytes=max_bytes)
+    names = [f'TAC_shard{shard.number:04d}.xml' for shard in shards]
+    files = [f'{directory}/{name}' for name in names]
+    
+    for old in glob(f'{directory}/TAC_shard*.xml*'):
+        if basename(old).removesuffix('.gz') not in names:
+            remove(old)
+    
+    write_all(shards, files, registry=registry, workers=workers, compress=compress)
+    
+    save_plan(shards, files, f'{directory}/manifest.json', max_articles=max_articles,
+              max_bytes=max_bytes)
+    
+    if stats is not None:
+        stats.update(volumes=len(volumes), invalid=len(invalid), shards=len(shards),
+                     bytes=sum(map(getsize, files)))
+    
+    return report
+
+def group_volumes(articles: list[Article], registry: MetadataRegistry,
+                  volume_titles: Optional[dict[int, str]] = None) -> list[Volume]:
+    # Articles from volumes missing from the site index (and index entries with no
+    # articles) are left out here and reported by validate_volumes.
+    volume_titles = registry.volume_titles if volume_titles is None else volume_titles
+    by_volume = {}
+    volumes = []
     first_id = 1
     
-    for vol in vol_nums:
-        article_list = []
-        ct = 0
-        
-        while article and article.volume == vol:
-            article_list.append(article)
-            article = next(article_iter, None)
-            ct += 1
+    for article in articles:
+        by_volume.setdefault(article.volume, []).append(article)
+    
+    for vol, vol_title in volume_titles.items():
+        if vol in by_volume:
+            volumes.append(Volume(by_volume[vol], first_id, registry, vol_title))
+            first_id += len(by_volume[vol])
+    
+    return volumes
+
+def write_all(items: list, files: list[str], *, registry: MetadataRegistry,
+              workers: int = 1, compress: bool = False) -> None:
+    # Volumes or shards, each written to its own file.
+    if workers == 1:
+        for item, file in zip(items, files):
+            write_volume(item, file, compress=compress)
+    elif items:
+        # Load the lookup tables once here so they travel with each pickled item instead
+        # of being re-read from disk by every task.
+        registry.load('author_ids')
+        registry.load('pdf_sizes')
         
-        metadata[vol - 1] = Volume(article_list, first_id).get_XML()
-        first_id += ct
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(write_volume, item, file, compress)
+                       for item, file in zip(items, files)]
+            
+            for future in futures:
+                future.result()
+
+def write_volume(volume, file: str, compress: bool = False) -> None:
+    # Anything with write_XML(*files), i.e. a Volume or a Shard.
+    with open(file, 'wb') as f:
+        if compress:
+            with gzip.open(f'{file}.gz', 'wb') as gz:
+                volume.write_XML(f, gz)
+        else:
+            volume.write_XML(f)
+
+# %%
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = ArgumentParser(description='Collect TAC metadata and render OJS import XML.')
+    parser.add_argument('stages', nargs='*', metavar='stage',
+                        help=f'stages to run, from {", ".join(STAGES)} (default: all)')
+    parser.add_argument('--path', default='data', help='data directory (default: data)')
+    parser.add_argument('--offline', action='store_true',
+                        help='replay recorded HTTP responses instead of using the network')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes for parsing and rendering (0 for all cores)')
+    parser.add_argument('--full', action='store_true',
+                        help='ignore the build manifest and rebuild everything')
+    parser.add_argument('--refresh', action='store_true',
+                        help='re-check stored abstract pages with conditional requests')
+    parser.add_argument('--revalidate', action='store_true',
+                        help='re-check cached PDF sizes with conditional requests')
+    parser.add_argument('--compress', action='store_true',
+                        help='also write gzipped copies of the XML files')
+    parser.add_argument('--report', metavar='FILE',
+                        help='write a JSON timing report for the run to FILE')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='run the stages under cProfile and dump the stats to FILE')
+    parser.add_argument('--time-articles', action='store_true',
+                        help='time each Article parse method (parses serially)')
+    parser.add_argument('--shard-articles', type=int, metavar='N',
+                        help='write import batches of at most N articles to xml_shards/')
+    parser.add_argument('--shard-size', type=float, metavar='MB',
+                        help='write import batches of about MB megabytes to xml_shards/')
+    parser.add_argument('--schema', metavar='XSD',
+                        help='also validate the XML files against this schema (needs lxml)')
+    args = parser.parse_args(argv)
+    
+    unknown = set(args.stages).difference(STAGES)
+    
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(sorted(unknown))}')
     
-    for vol, xml in enumerate(metadata, 1):
-        with open(f'{path}/xml_files/TAC_vol{vol}.xml', 'w') as f:
-            f.write(xml)
+    stats = Instrumentation(profile=bool(args.profile))
+    pipeline = Pipeline(path=args.path, workers=args.workers or cpu_count(),
+                        offline=args.offline, incremental=not args.full,
+                        refresh=args.refresh, revalidate=args.revalidate,
+                        compress=args.compress, stats=stats,
+                        time_articles=args.time_articles, schema=args.schema,
+                        shard_articles=args.shard_articles,
+                        shard_bytes=int(args.shard_size * 1e6) if args.shard_size else None)
+    pipeline.run(args.stages or STAGES)
     
-    with gzip.open(f'{path}/metadata.gz', 'wb') as f:
-        pickle.dump(metadata, f)
+    if args.report:
+        stats.save(args.report)
+    if args.profile:
+        stats.dump_profile(args.profile)
+    if pipeline.report is not None and not pipeline.report:
+        parser.exit(1, f'{len(pipeline.report.problems)} validation problems, see '
+                       f'{args.path}/validation.json\n')
 
 # %%
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# %%
+import gzip
+import hashlib
+import pickle
+
+from os.path import dirname, exists, join
+
+# Files whose contents decide how pages are parsed and rendered. Editing any of them
+# invalidates every cached article and volume hash.
+BUILD_INPUTS = ['publications.py', 'xml_templates.py', 'corrections.py', 'author_index.py',
+                'data/corrections.json']
+
+def digest(*parts) -> str:
+    h = hashlib.sha256()
+    
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode())
+        h.update(b'\0')
+    
+    return h.hexdigest()
+
+def build_version() -> str:
+    root = dirname(__file__)
+    files = []
+    
+    for name in BUILD_INPUTS:
+        with open(join(root, name), 'rb') as f:
+            files.append(f.read())
+    
+    return digest(*files)
+
+# %%
+class BuildManifest:
+    def __init__(self, path: str = 'data'):
+        self.file = f'{path}/manifest.gz'
+        self.version = build_version()
+        self.pages = {}
+        self.volumes = {}
+        
+        if exists(self.file):
+            with gzip.open(self.file, 'rb') as f:
+                manifest = pickle.load(f)
+            
+            if manifest['version'] == self.version:
+                self.pages, self.volumes = manifest['pages'], manifest['volumes']
+    
+    def save(self) -> None:
+        with gzip.open(self.file, 'wb') as f:
+            pickle.dump({'version': self.version, 'pages': self.pages,
+                         'volumes': self.volumes}, f)
+    
+    @staticmethod
+    def page_hash(source: str) -> str:
+        return digest(source.encode())
+    
+    @staticmethod
+    def volume_hash(volume) -> str:
+        registry = volume.registry
+        author_ids = registry.author_ids
+        
+        return digest(volume.volume, volume.title, volume.file_ids,
+                      *(article.astuple() for article in volume.articles),
+                      [author_ids[author] for article in volume.articles
+                       for author in article.authors],
+                      [registry.pdf_size(article.pdf_src) for article in volume.articles])
+    
+    def volume_changed(self, volume, file: str) -> bool:
+        return (not exists(file)
+                or self.volumes.get(volume.volume) != self.volume_hash(volume))
+    
+    def mark_rendered(self, volume) -> None:
+        self.volumes[volume.volume] = self.volume_hash(volume)
@@ -0,0 +1,40 @@
+# %%
+import gzip
+import pickle
+
+from datetime import datetime as dt
+from os import stat
+
+# %%
+class MetadataRegistry:
+    def __init__(self, path: str = 'data'):
+        self.path = path
+        self.tables = {}
+        self.date = dt.now().strftime('%Y-%m-%d')
+    
+    def load(self, name: str):
+        file = f'{self.path}/{name}.gz'
+        mtime = stat(file).st_mtime_ns
+        
+        # Tables are unpickled once and then reused until the file on disk is rewritten,
+        # e.g. when save_author_ids runs again in the same process.
+        if name not in self.tables or self.tables[name][0] != mtime:
+            with gzip.open(file, 'rb') as f:
+                self.tables[name] = (mtime, pickle.load(f))
+        
+        return self.tables[name][1]
+    
+    @property
+    def author_ids(self) -> dict[str, int]:
+        return self.load('author_ids')
+    
+    @property
+    def volume_titles(self) -> dict[int, str]:
+        return self.load('volume_titles')
+    
+    @property
+    def pdf_sizes(self) -> dict[str, dict]:
+        return self.load('pdf_sizes')
+    
+    def pdf_size(self, url: str) -> int:
+        return self.pdf_sizes[url]['size']
@@ -0,0 +1,118 @@
+# %%
+import json
+
+from os.path import basename, getsize
+from publications import Article, Volume
+from typing import BinaryIO, Optional
+from xml_templates import ARTICLE, AUTHOR, KEYWORD, VOLUME_HEAD, VOLUME_SEP, VOLUME_TAIL
+
+# Static text per rendered element, for estimating block sizes without rendering.
+ARTICLE_STATIC = sum(map(len, ARTICLE.pieces[::2])) + len(VOLUME_SEP)
+AUTHOR_STATIC = sum(map(len, AUTHOR.pieces[::2]))
+KEYWORD_STATIC = sum(map(len, KEYWORD.pieces[::2]))
+ARTICLE_FIELDS = 160 # Dates, IDs, sequence numbers, year, pages and the issue title
+
+def estimate_size(article: Article) -> int:
+    return (ARTICLE_STATIC + ARTICLE_FIELDS + 2 * len(article.pdf_src) + len(article.title)
+            + len(article.abstract) + (AUTHOR_STATIC + 8) * len(article.authors)
+            + sum(map(len, article.authors)) + KEYWORD_STATIC * len(article.keywords)
+            + sum(map(len, article.keywords)))
+
+# %%
+class Shard:
+    def __init__(self, number: int, parts: list[tuple[Volume, int, int]]):
+        # Each part is a run of articles volume.articles[start:stop]. Articles keep the
+        # file IDs and in-volume sequence numbers their volume gave them, so a shard renders
+        # exactly the blocks the per-volume files would contain.
+        self.number = number
+        self.registry = parts[0][0].registry
+        self.parts = [(volume.volume, volume.title, start, volume.file_ids[start],
+                       volume.articles[start:stop]) for volume, start, stop in parts]
+    
+    def __repr__(self):
+        return f'Shard {self.number} ({len(self)} articles)'
+    
+    def __len__(self) -> int:
+        return sum(len(articles) for *_, articles in self.parts)
+    
+    @property
+    def file_ids(self) -> list[int]:
+        return [first_id + i for *_, first_id, articles in self.parts
+                for i in range(len(articles))]
+    
+    def author_ids(self) -> list[int]:
+        author_ids = self.registry.author_ids
+        return sorted({author_ids[author] for *_, articles in self.parts
+                       for article in articles for author in article.authors})
+    
+    def estimate_size(self) -> int:
+        return sum(estimate_size(article) for *_, articles in self.parts
+                   for article in articles)
+    
+    def describe(self, file: str) -> dict:
+        # IDs are listed rather than given as ranges: file IDs skip the volumes left out as
+        # invalid, and author IDs are global and shared between shards.
+        return {'file': basename(file), 'articles': len(self),
+                'estimated_bytes': self.estimate_size(), 'bytes': getsize(file),
+                'file_ids': self.file_ids,
+                'author_ids': self.author_ids(),
+                'volumes': [{'volume': vol, 'seq': [start, start + len(articles) - 1]}
+                            for vol, _, start, _, articles in self.parts]}
+    
+    def write_XML(self, *files: BinaryIO) -> None:
+        def write(data: bytes) -> None:
+            for f in files:
+                f.write(data)
+        
+        write(VOLUME_HEAD)
+        first = True
+        
+        for _, title, start, first_id, articles in self.parts:
+            for i, article in enumerate(articles):
+                if not first:
+                    write(VOLUME_SEP)
+                
+                write(article.get_XML_bytes(first_id + i, start + i, title, self.registry))
+                first = False
+        
+        write(VOLUME_TAIL)
+
+# %%
+def plan_shards(volumes: list[Volume], *, max_articles: Optional[int] = None,
+                max_bytes: Optional[int] = None) -> list[Shard]:
+    # Greedy, in volume order: small volumes share a shard and a large one is split across
+    # several. A shard always takes at least one article, even if it alone is too big.
+    shards, parts = [], []
+    count = size = 0
+    
+    for volume in volumes:
+        start = 0
+        
+        for i, article in enumerate(volume.articles):
+            block = estimate_size(article)
+            
+            if count and ((max_articles and count >= max_articles)
+                          or (max_bytes and size + block > max_bytes)):
+                if i > start:
+                    parts.append((volume, start, i))
+                    start = i
+                
+                shards.append(Shard(len(shards) + 1, parts))
+                parts = []
+                count = size = 0
+            
+            count += 1
+            size += block
+        
+        parts.append((volume, start, len(volume.articles)))
+    
+    if parts:
+        shards.append(Shard(len(shards) + 1, parts))
+    
+    return shards
+
+def save_plan(shards: list[Shard], files: list[str], file: str, **limits) -> None:
+    with open(file, 'w', encoding='utf-8') as f:
+        json.dump({**limits, 'shards': [shard.describe(name)
+                                        for shard, name in zip(shards, files)]},
+                  f, indent=2)
@@ -0,0 +1,82 @@
+# %%
+import sqlite3
+import zlib
+
+from typing import Iterable, Iterator, Optional
+
+# %%
+class SourceStore:
+    def __init__(self, file: str = 'data/sources.sqlite'):
+        self.db = sqlite3.connect(file)
+        self.db.execute('CREATE TABLE IF NOT EXISTS pages '
+                        '(url TEXT PRIMARY KEY, volume INTEGER, body BLOB NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_volume ON pages (volume)')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+    
+    def __contains__(self, url: str) -> bool:
+        row = self.db.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone()
+        return row is not None
+    
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        return self.items()
+    
+    def close(self) -> None:
+        self.db.close()
+    
+    def put(self, url: str, source: str, volume: Optional[int] = None) -> None:
+        self.put_many([(url, source, volume)])
+    
+    def put_many(self, pages: Iterable[tuple[str, str, Optional[int]]]) -> None:
+        # Rows are independent, so adding pages never rewrites the ones already stored.
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO pages VALUES (?, ?, ?)',
+                                ((url, volume, zlib.compress(source.encode()))
+                                 for url, source, volume in pages))
+    
+    def discard(self, urls: Iterable[str]) -> None:
+        with self.db:
+            self.db.executemany('DELETE FROM pages WHERE url = ?', ((url,) for url in urls))
+    
+    def get(self, url: str) -> str:
+        row = self.db.execute('SELECT body FROM pages WHERE url = ?', (url,)).fetchone()
+        
+        if row is None:
+            raise KeyError(url)
+        
+        return zlib.decompress(row[0]).decode()
+    
+    def urls(self, volume: Optional[int] = None) -> list[str]:
+        if volume is None:
+            rows = self.db.execute('SELECT url FROM pages ORDER BY url')
+        else:
+            rows = self.db.execute('SELECT url FROM pages WHERE volume = ? ORDER BY url',
+                                   (volume,))
+        
+        return [url for url, in rows]
+    
+    def volumes(self) -> list[int]:
+        rows = self.db.execute('SELECT DISTINCT volume FROM pages '
+                               'WHERE volume IS NOT NULL ORDER BY volume')
+        return [volume for volume, in rows]
+    
+    def items(self, volume: Optional[int] = None) -> Iterator[tuple[str, str]]:
+        # The cursor is consumed lazily, so only one page is decompressed at a time.
+        if volume is None:
+            rows = self.db.execute('SELECT url, body FROM pages ORDER BY url')
+        else:
+            rows = self.db.execute('SELECT url, body FROM pages WHERE volume = ? '
+                                   'ORDER BY url', (volume,))
+        
+        for url, body in rows:
+            yield url, zlib.decompress(body).decode()
+    
+    def sources(self, volume: Optional[int] = None) -> Iterator[str]:
+        return (source for _, source in self.items(volume))
@@ -0,0 +1,172 @@
+# %%
+import json
+import xml.etree.ElementTree as ET
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+from publications import Article, Volume
+from registry import MetadataRegistry
+from typing import Iterable, Optional, Union
+
+try:
+    from lxml import etree
+except ImportError: # Schema validation is optional; well-formedness only needs the stdlib
+    etree = None
+
+# %%
+class ValidationReport:
+    def __init__(self):
+        self.problems = []
+        self.volumes_checked = 0
+        self.files_checked = 0
+    
+    def __bool__(self) -> bool:
+        return not self.problems
+    
+    def add(self, check: str, message: str, *, volume: Optional[int] = None,
+            file: Optional[str] = None) -> None:
+        self.problems.append({'check': check, 'volume': volume, 'file': file,
+                              'message': message})
+    
+    def extend(self, problems: Iterable[dict]) -> None:
+        self.problems.extend(problems)
+    
+    def invalid_volumes(self) -> set[int]:
+        return {problem['volume'] for problem in self.problems
+                if problem['volume'] is not None}
+    
+    def save(self, file: str) -> None:
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump({'valid': bool(self), 'volumes_checked': self.volumes_checked,
+                       'files_checked': self.files_checked, 'problems': self.problems},
+                      f, indent=2)
+
+# %%
+def validate_volumes(volumes: list[Volume], registry: MetadataRegistry,
+                     articles: Optional[list[Article]] = None,
+                     report: Optional[ValidationReport] = None) -> ValidationReport:
+    # Everything is checked before anything is rendered and every problem is recorded, so
+    # one bad page flags its volume instead of stopping the run.
+    report = ValidationReport() if report is None else report
+    author_ids = load_table(registry, 'author_ids', report)
+    pdf_sizes = load_table(registry, 'pdf_sizes', report)
+    seen_ids = {}
+    
+    for volume in volumes:
+        report.volumes_checked += 1
+        vol = volume.volume
+        articles_this = volume.articles
+        
+        for article in articles_this:
+            if article.volume != vol:
+                report.add('volume', f'{article.title!r} is from volume {article.volume}.',
+                           volume=vol)
+            if article.start_page > article.end_page:
+                report.add('pages', f'{article.title!r} has page range '
+                           f'{article.start_page}-{article.end_page}.', volume=vol)
+            
+            missing = [author for author in article.authors if author not in author_ids]
+            
+            if missing:
+                report.add('author_ids', f'No author ID for {", ".join(missing)} '
+                           f'({article.title!r}).', volume=vol)
+            if article.pdf_src not in pdf_sizes:
+                report.add('pdf_sizes', f'No PDF size for {article.pdf_src}.', volume=vol)
+        
+        for prev, article in zip(articles_this, articles_this[1:]):
+            if prev.end_page + 1 != article.start_page:
+                report.add('contiguity', f'{prev.title!r} ends on page {prev.end_page} but '
+                           f'{article.title!r} starts on page {article.start_page}.',
+                           volume=vol)
+        
+        for file_id in volume.file_ids:
+            if file_id in seen_ids:
+                report.add('file_ids', f'File ID {file_id} is also used in volume '
+                           f'{seen_ids[file_id]}.', volume=vol)
+            
+            seen_ids[file_id] = vol
+    
+    grouped = {volume.volume for volume in volumes}
+    
+    for vol in load_table(registry, 'volume_titles', report).keys() - grouped:
+        report.add('volume', f'Volume {vol} is listed on the site but has no articles.')
+    
+    for article in articles or []:
+        if article.volume not in grouped:
+            report.add('volume', f'{article.title!r} is from volume {article.volume}, '
+                       'which is not listed on the site.')
+    
+    return report
+
+def load_table(registry: MetadataRegistry, name: str, report: ValidationReport) -> dict:
+    # A table that was never written counts as empty, so every lookup in it is reported
+    # as missing coverage. The table itself is reported once, however often it is read.
+    try:
+        return registry.load(name)
+    except FileNotFoundError:
+        message = f'{registry.path}/{name}.gz is missing.'
+        
+        if not any(problem['message'] == message for problem in report.problems):
+            report.add('tables', message)
+        
+        return {}
+
+# %%
+@cache
+def load_schema(schema: str):
+    # Compiled once per process; worker processes each keep their own copy.
+    if etree is None:
+        raise ImportError('Schema validation needs lxml (pip install lxml).')
+    
+    return etree.XMLSchema(etree.parse(schema))
+
+def validate_file(file: str, vol: Optional[int] = None,
+                  schema: Optional[str] = None) -> list[dict]:
+    problem = lambda check, message: {'check': check, 'volume': vol, 'file': file,
+                                      'message': message}
+    
+    if schema:
+        xsd = load_schema(schema)
+        
+        try:
+            document = etree.parse(file)
+        except etree.XMLSyntaxError as error:
+            return [problem('well_formed', str(error))]
+        
+        if xsd.validate(document):
+            return []
+        
+        return [problem('schema', f'line {error.line}: {error.message}')
+                for error in xsd.error_log]
+    
+    # Without a schema only well-formedness is checked, streaming so that a large volume
+    # is never held in memory as a tree.
+    try:
+        for _, element in ET.iterparse(file):
+            element.clear()
+    except ET.ParseError as error:
+        return [problem('well_formed', str(error))]
+    
+    return []
+
+def validate_files(files: Union[dict[int, str], list[str]], *, schema: Optional[str] = None,
+                   workers: int = 1, report: Optional[ValidationReport] = None
+                   ) -> ValidationReport:
+    report = ValidationReport() if report is None else report
+    check = partial(validate_file, schema=schema)
+    # Files that do not belong to a single volume (e.g. shards) are passed as a plain list.
+    vols, files = (list(files), list(files.values())) if isinstance(files, dict) else \
+        ([None] * len(files), list(files))
+    
+    # Files are independent, so each is parsed (and schema-checked) in its own task.
+    if workers == 1:
+        results = list(map(check, files, vols))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(check, files, vols))
+    
+    for problems in results:
+        report.files_checked += 1
+        report.extend(problems)
+    
+    return report
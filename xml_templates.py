@@ -0,0 +1,140 @@
+# %%
+import html
+import re
+
+from operator import itemgetter
+from string import Formatter
+from typing import Iterable, Sequence
+
+# Character references other than the ones that carry markup meaning in HTML.
+CHAR_REF = re.compile(r'&(?!(?:amp|lt|gt|quot);)#?\w+;?')
+SPECIAL = re.compile(r'[&<>"]')
+
+def escape(text) -> str:
+    # Chained str.replace, skipped when the character is absent, is an order of magnitude
+    # faster than str.translate with multi-character replacements. '&' must go first.
+    text = str(text)
+    
+    if not SPECIAL.search(text):
+        return text
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    if '"' in text:
+        text = text.replace('"', '&quot;')
+    
+    return text
+
+def escape_text(text: str) -> str:
+    # Most names and keywords need no escaping at all, so check once before doing any work.
+    return escape(html.unescape(text)) if SPECIAL.search(text) else text
+
+def escape_html(text: str) -> str:
+    # OJS stores HTML fields (titles, abstracts) as escaped markup. Named and numeric
+    # references become plain characters, as XML only predefines the five markup entities.
+    if '&' in text:
+        text = CHAR_REF.sub(lambda ref: html.unescape(ref.group()), text)
+    
+    return escape(text)
+
+# %%
+class Template:
+    def __init__(self, text: str):
+        # Compile once into the static fragments with a slot between each pair for a field.
+        # Rendering copies the slots, drops the values in and does one join, which measured
+        # faster than %-formatting the whole block or joining pre-encoded bytes fragments.
+        parsed = list(Formatter().parse(text))
+        self.fields = [field for _, field, _, _ in parsed if field is not None]
+        literals = [literal for literal, _, _, _ in parsed]
+        
+        if len(literals) == len(self.fields):
+            literals.append('')
+        
+        self.pieces = [None] * (2 * len(literals) - 1)
+        self.pieces[::2] = literals
+        
+        if len(self.fields) == 1:
+            self.values = lambda values, field=self.fields[0]: (values[field],)
+        else:
+            self.values = itemgetter(*self.fields)
+    
+    def fill(self, row: Sequence[str]) -> str:
+        pieces = self.pieces.copy()
+        pieces[1::2] = row
+        return ''.join(pieces)
+    
+    def render(self, **values: str) -> str:
+        return self.fill(self.values(values))
+    
+    def render_many(self, rows: Iterable[Sequence[str]]) -> str:
+        # Rows hold pre-escaped values in field order; used for repeated elements.
+        return ''.join(map(self.fill, rows))
+
+# %%
+NS = 'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+SCHEMA = 'xsi:schemaLocation="http://pkp.sfu.ca native.xsd"'
+
+VOLUME_HEAD = ('<?xml version="1.0" encoding="utf-8"?>\n'
+               f'<articles {NS} {SCHEMA}>\n').encode()
+VOLUME_SEP = b'\n'
+VOLUME_TAIL = b'</articles>'
+
+ARTICLE = Template(
+    f'  <article xmlns="http://pkp.sfu.ca" {NS} locale="en" date_submitted="{{date}}" '
+    'status="3" submission_progress="" current_publication_id="1" stage="production" '
+    f'{SCHEMA}>\n'
+    '    <id type="internal" advice="ignore">{file_id}</id>\n'
+    f'    <submission_file {NS} id="{{file_id}}" created_at="{{date}}" date_created="" '
+    'file_id="{file_id}" stage="submission" updated_at="{date}" viewable="true" '
+    'genre="Article Text" source_submission_file_id="{file_id}" uploader="admin" '
+    f'{SCHEMA}>\n'
+    '      <name locale="en">{pdf_name}</name>\n'
+    '      <file id="{file_id}" filesize="{size}" extension="pdf">\n'
+    '        <href src="{pdf_src}"/>\n'
+    '      </file>\n'
+    '    </submission_file>\n'
+    f'    <publication {NS} version="1" status="3" primary_contact_id="{{primary_id}}" '
+    'url_path="" seq="{seq}" access_status="0" date_published="{date}" section_ref="ART" '
+    f'{SCHEMA}>\n'
+    '      <id type="internal" advice="ignore">{file_id}</id>\n'
+    '      <id type="doi" advice="update">10.1119/5.0158200</id>\n'
+    '      <title locale="en">{title}</title>\n'
+    '      <abstract locale="en">{abstract}</abstract>\n'
+    '      <licenseUrl>http://www.tac.mta.ca/tac/consent.html</licenseUrl>\n'
+    '      <copyrightHolder locale="en">author</copyrightHolder>\n'
+    '      <copyrightYear>{year}</copyrightYear>\n'
+    '      <keywords locale="en">\n'
+    '{keywords}'
+    '      </keywords>\n'
+    f'      <authors {NS} {SCHEMA}>\n'
+    '{authors}'
+    '      </authors>\n'
+    f'      <article_galley {NS} locale="en" url_path="" approved="false" {SCHEMA}>\n'
+    '        <id type="internal" advice="ignore">{file_id}</id>\n'
+    '        <name locale="en">PDF</name>\n'
+    '        <seq>{seq}</seq>\n'
+    '        <submission_file_ref id="{file_id}"/>\n'
+    '      </article_galley>\n'
+    '      <issue_identification>\n'
+    '        <volume>{volume}</volume>\n'
+    '        <year>{year}</year>\n'
+    '{issue_title}'
+    '      </issue_identification>\n'
+    '      <pages>{pages}</pages>\n'
+    '    </publication>\n'
+    '  </article>\n')
+
+KEYWORD = Template('        <keyword>{keyword}</keyword>\n')
+
+AUTHOR = Template(
+    '        <author include_in_browse="true" user_group_ref="Author" seq="{seq}" '
+    'id="{author_id}">\n'
+    '          <givenname locale="en">{given_name}</givenname>\n'
+    '          <familyname locale="en">{family_name}</familyname>\n'
+    '          <email>madeup@email.org</email>\n'
+    '        </author>\n')
+
+ISSUE_TITLE = Template('        <title locale="en">{title}</title>\n')